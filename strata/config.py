@@ -45,11 +45,12 @@ unprovided, and allow other Variables to pass unprovided.
 
 """
 
+import logging
+from types import MethodType
 from itertools import chain
 from collections import deque
 
 from .core import DEBUG, Provider
-from .utils import inject
 from .errors import (ConfigException,
                      NotProvidable,
                      DependencyCycle,
@@ -58,8 +59,15 @@ from .layers import StrataConfigLayer, StrataDefaultLayer
 
 from .tableutils import Table
 
+logger = logging.getLogger(__name__)
+
+_SPEC_CACHE = {}
+_EMPTY_DICT = {}  # shared, never modified
+
 
 class Resolution(object):
+    __slots__ = ('by', 'value')
+
     def __init__(self, by, value=None):
         self.by = by
         self.value = value
@@ -70,16 +78,18 @@ class Resolution(object):
 
 
 class Pruned(Resolution):
+    __slots__ = ()
+
     def __init__(self, by=None, value=None):
         return super(Pruned, self).__init__(by, value)
 
 
 class Satisfied(Resolution):
-    pass
+    __slots__ = ()
 
 
 class Unsatisfied(Resolution):
-    pass
+    __slots__ = ()
 
 
 class ConfigSpec(object):
@@ -92,12 +102,33 @@ class ConfigSpec(object):
         self._input_variables = list(variables or [])
 
         ap_vars = [layer._get_autoprovided() for layer in self.layers]
-        self._autoprovided_variables = list(chain(*ap_vars))
+        self._autoprovided_variables = list(chain.from_iterable(ap_vars))
         self.variables = self._input_variables + self._autoprovided_variables
 
         self.name_var_map = dict([(v.name, v) for v in self.variables])
+        self.name_var_instance_map = dict([(n, v()) for n, v
+                                           in self.name_var_map.items()])
         self._compute()
 
+    @classmethod
+    def cached(cls, variables, layers):
+        """\
+        Like the constructor, but returns the spec already built from
+        the same variable and layer types, if any. The types must not
+        change after the first build, as the cached spec won't reflect
+        it. Cached specs are kept until clear_cache() is called.
+        """
+        key = (cls, tuple(variables or ()), tuple(layers or ()))
+        try:
+            return _SPEC_CACHE[key]
+        except KeyError:
+            ret = _SPEC_CACHE[key] = cls(variables, layers)
+            return ret
+
+    @staticmethod
+    def clear_cache():
+        _SPEC_CACHE.clear()
+
     @classmethod
     def from_modules(cls, modules):
         """find all variables/layers in the modules.
@@ -117,10 +148,10 @@ class ConfigSpec(object):
         vpm = self.var_provider_map = {}
         vcm = self.var_consumer_map = {}
         layers, variables = self.layers, self.variables
-        name_var_map = dict(self.name_var_map)
+        name_var_map = self.name_var_map
 
-        to_proc = [v.name for v in variables]
-        unresolved = []
+        to_proc = set([v.name for v in variables])
+        unresolved = set()
         while to_proc:
             cur_var_name = to_proc.pop()
             var = name_var_map[cur_var_name]
@@ -133,16 +164,17 @@ class ConfigSpec(object):
                 for dn in provider.dep_names:
                     vcm.setdefault(dn, []).append(provider)
                     if dn not in name_var_map:
-                        unresolved.append(dn)
-                        name_var_map[dn] = None
-                        #to_proc.append(dn)
+                        unresolved.add(dn)
             if cur_var_name not in vpm:
                 raise UnresolvedDependency('no providers found for: %r' % var)
         if unresolved:
-            raise UnresolvedDependency('unresolved deps: %r' % unresolved)
-        self.all_providers = sum(vpm.values(), [])
+            raise UnresolvedDependency('unresolved deps: %r'
+                                       % sorted(unresolved))
+        self.all_providers = list(chain.from_iterable(vpm.values()))
         self.all_var_names = sorted(vpm.keys())
 
+        self._bind_plan = self._compute_bind_plan(vpm)
+
         sdm = self.slot_dep_map = self._compute_slot_dep_map(vpm)
         srdm = self.slot_rdep_map = self._compute_rdep_map(sdm)
         sorted_dep_slots = jit_toposort(srdm)
@@ -153,6 +185,26 @@ class ConfigSpec(object):
                 slot_order.append(var_name)
         self.slot_order = slot_order
 
+    @staticmethod
+    def _compute_bind_plan(var_provider_map):
+        """\
+        Does the spec-level part of Provider.get_bound() once, so that
+        ConfigProcessors need only bind unbound methods to their layer
+        instances. Returns a list of (var_name, layer_type, func,
+        dep_names, is_method) tuples, in layer order for each variable.
+        """
+        bind_plan = []
+        for var_name, providers in var_provider_map.items():
+            for provider in providers:
+                func, layer_type = provider.func, provider.layer_type
+                is_method = (getattr(func, 'im_self', True) is None
+                             and issubclass(layer_type, func.im_class))
+                if is_method:
+                    func = func.im_func
+                bind_plan.append((var_name, layer_type, func,
+                                  provider.dep_names, is_method))
+        return bind_plan
+
     @staticmethod
     def _compute_slot_dep_map(var_provider_map, preprovided=None):
         preprovided = preprovided or set()
@@ -161,27 +213,69 @@ class ConfigSpec(object):
             if var in preprovided:
                 slot_dep_map[var] = set()
             else:
-                slot_deps = sum([list(p.dep_names) for p in providers], [])
+                slot_deps = chain.from_iterable(p.dep_names for p in providers)
                 slot_dep_map[var] = set(slot_deps)
         return slot_dep_map
 
     @staticmethod
     def _compute_rdep_map(dep_map):
-        "compute recursive dependency map"
+        """compute recursive dependency map
+
+        Uses an iterative form of Tarjan's strongly-connected components
+        algorithm. Components are emitted dependencies-first, so each
+        variable's recursive deps are built from its direct deps' already
+        computed sets. Any component with more than one member (or a
+        variable which depends on itself) is a dependency cycle.
+        """
         rdep_map = {}
-        for var, slot_deps in dep_map.items():
-            to_proc, rdeps, i = [var], set(), 0
-            while to_proc:
-                i += 1  # TODO: better circdep handlin
-                if i > 50:
-                    msg = ('dependency cycle: %r recursively depends on %r'
-                           % (var, sorted(rdeps)))
-                    raise DependencyCycle(msg)
-                cur = to_proc.pop()
-                cur_rdeps = dep_map.get(cur, [])
-                to_proc.extend([c for c in cur_rdeps if c not in to_proc])
-                rdeps.update(cur_rdeps)
-            rdep_map[var] = rdeps
+        index, lowlink, on_stack, stack = {}, {}, set(), []
+        for root in dep_map:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            if not dep_map[root]:
+                rdep_map[root] = set()
+                continue
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(dep_map[root]))]
+            while work:
+                var, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        if not dep_map.get(child):
+                            if child in dep_map:
+                                rdep_map[child] = set()
+                            continue  # no deps, a component of its own
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(dep_map.get(child, ()))))
+                        break
+                    elif child in on_stack:
+                        lowlink[var] = min(lowlink[var], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[var])
+                    if lowlink[var] != index[var]:
+                        continue
+                    component = [stack.pop()]
+                    while component[-1] != var:
+                        component.append(stack.pop())
+                    on_stack.difference_update(component)
+                    deps = dep_map.get(var, ())
+                    if len(component) > 1 or var in deps:
+                        msg = ('dependency cycle: %r recursively depend on'
+                               ' one another' % sorted(component))
+                        raise DependencyCycle(msg)
+                    if var not in dep_map:
+                        continue  # unknown extra, no deps of its own
+                    rdeps = set(deps)
+                    for dep in deps:
+                        rdeps.update(rdep_map.get(dep, ()))
+                    rdep_map[var] = rdeps
         return rdep_map
 
 
@@ -213,20 +307,26 @@ class ConfigProcessor(object):
         self.layer_map = dict(layer_type_pairs)
 
     def _init_providers(self):
-        vpm = self.config._config_spec.var_provider_map
+        bind_plan = self.config._config_spec._bind_plan
         bpm = self.bound_provider_map = {}
         bpl = self.bound_provider_list = []
-        for name, provider_list in vpm.items():
-            bound_providers = [cp.get_bound(self.layer_map[cp.layer_type])
-                               for cp in provider_list]
-            bpm[name] = bound_providers
+        for var_name, layer_type, func, dep_names, is_method in bind_plan:
+            layer_inst = self.layer_map[layer_type]
+            if is_method:
+                func = MethodType(func, layer_inst, layer_type)
+            bound_provider = Provider(layer_inst, var_name, func, dep_names)
+            bound_provider._invoker = _build_invoker(func, dep_names)
+            bound_providers = bpm.setdefault(var_name, [])
+            bound_provider._layer_order = len(bound_providers)
+            bound_providers.append(bound_provider)
         # TODO: cleaner way to make config_provider ?
         config_provider = Provider(self._strata_config_layer,
                                    'config',
                                    lambda: self.config)
+        config_provider._layer_order = 0
         bpm['config'] = [config_provider]
         self.satisfy(config_provider, self.config)
-        bpl.extend(chain(*bpm.values()))
+        bpl.extend(chain.from_iterable(bpm.values()))
 
     def _build_error(self, var_name):
         # provide -> satisfy?
@@ -241,34 +341,62 @@ class ConfigProcessor(object):
         return '\n'.join(lines)
 
     def process(self):
+        """\
+        Each variable has at most one candidate provider at a time,
+        tried in layer order. Candidates wait on their unsatisfied deps
+        and are queued to run once the last one is satisfied, so no
+        provider is examined more than once per attempt.
+        """
         bpm, prm = self.bound_provider_map, self.provider_result_map
-        nrm, nvm = self.name_result_map, self.name_value_map
-
-        to_proc = deque(chain(*[bpm[var_name] for var_name in self.req_names]))
-        while to_proc:
-            cp = to_proc.popleft()
-            if cp in prm:
-                continue  # already run/memoized
-            if cp.var_name in nvm:
-                continue  # already satisfied
-            unsat_deps = [dep for dep in cp.dep_names if dep not in nvm]
-            if unsat_deps:
-                to_proc.appendleft(cp)  # repushing current
+        nvm = self.name_value_map
+        name_var_instance_map = self.config._config_spec.name_var_instance_map
+
+        cand_idx_map = {}  # var name -> index of current candidate in bpm
+        waiter_map = {}  # dep name -> candidates waiting on it
+        remaining_map = {}  # candidate -> count of unsatisfied deps
+        to_proc = deque()
+        to_advance = list(self.req_names)
+        for var_name in to_advance:
+            cand_idx_map[var_name] = -1
+        while to_advance or to_proc:
+            while to_advance:
+                var_name = to_advance.pop()
+                if var_name in nvm:
+                    continue
+                bps = bpm[var_name]
+                cand_idx = cand_idx_map[var_name] = cand_idx_map[var_name] + 1
+                if cand_idx >= len(bps):
+                    if waiter_map.get(var_name):
+                        raise ValueError(self._build_error(var_name))
+                    continue  # unused, left for the config to report
+                cp = bps[cand_idx]
+                unsat_deps = [dep for dep in cp.dep_names if dep not in nvm]
                 for dep_name in unsat_deps:
-                    if (len(nrm.get(dep_name, [])) >= len(bpm[dep_name])):
-                        msg = self._build_error(dep_name)
-                        raise ValueError(msg)
-                    to_proc.extendleft(bpm[dep_name])
+                    if dep_name not in cand_idx_map:
+                        cand_idx_map[dep_name] = -1
+                        to_advance.append(dep_name)
+                    elif cand_idx_map[dep_name] >= len(bpm[dep_name]):
+                        raise ValueError(self._build_error(dep_name))
+                    waiter_map.setdefault(dep_name, []).append(cp)
+                remaining_map[cp] = len(unsat_deps)
+                if not unsat_deps:
+                    to_proc.append(cp)
+            if not to_proc:
                 continue
+            cp = to_proc.popleft()
             try:
-                value = inject(cp.func, nvm)
+                value = cp._invoker(nvm)
             except Exception as e:
                 self.unsatisfy(cp, e)
-            else:
-                _var = self.config._config_spec.name_var_map[cp.var_name]
-                _var = _var()  # TODO
-                processed_value = _var.process_value(value)
-                self.satisfy(cp, processed_value)  # save unprocessed
+                to_advance.append(cp.var_name)
+                continue
+            _var = name_var_instance_map[cp.var_name]
+            processed_value = _var.process_value(value)
+            self.satisfy(cp, processed_value)  # save unprocessed
+            for waiter in waiter_map.pop(cp.var_name, ()):
+                remaining_map[waiter] -= 1
+                if not remaining_map[waiter]:
+                    to_proc.append(waiter)
 
         for bp in self.bound_provider_list:
             if bp not in prm:
@@ -283,23 +411,28 @@ class ConfigProcessor(object):
         self.name_value_map[provider.var_name] = value
         self.name_satisfier_map[provider.var_name] = provider
         bps = self.bound_provider_map[provider.var_name]
-        pruned_bps = bps[bps.index(provider) + 1:]
+        pruned_bps = bps[provider._layer_order + 1:]
         for pbp in pruned_bps:
             self.prune(pbp, '<already satisfied>')
         return self.register_result(provider, result)
 
     def prune(self, provider, value):
         result = Pruned(by=provider, value=value)
-        if self._debug:
-            print ' == ', result
+        self._log_debug(' == %r', result)
         return self.register_result(provider, result)
 
     def unsatisfy(self, provider, exception):
         result = Unsatisfied(by=provider, value=exception)
-        if self._debug:
-            print ' - ', result
+        self._log_debug(' - %r', result)
         return self.register_result(provider, result)
 
+    def _log_debug(self, msg, *args):
+        # debug=True prints, as before; otherwise it's up to logging
+        if self._debug:
+            print msg % args
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(msg, *args)
+
     def register_result(self, provider, result):
         self.name_result_map.setdefault(provider.var_name, []).append(result)
         self.provider_result_map[provider] = result
@@ -320,21 +453,20 @@ class ConfigProcessor(object):
         lol = [[''] + sorted_vars]
         for layer in self.layers:
             layer_type = layer.__class__
+            layer_lookup = lookup.get(layer_type, _EMPTY_DICT)
             cur_row = [layer_type.__name__]
             for var_name in sorted_vars:
-                try:
-                    cur_provider = lookup[layer_type][var_name]
-                except KeyError:
+                cur_provider = layer_lookup.get(var_name)
+                if cur_provider is None:
                     val = ''
                 else:
-                    try:
-                        res = self.provider_result_map[cur_provider]
-                        if isinstance(res, Satisfied):
-                            val = res.value
-                        else:
-                            val = 'X'
-                    except KeyError:
+                    res = self.provider_result_map.get(cur_provider)
+                    if res is None:
                         val = '-'
+                    elif isinstance(res, Satisfied):
+                        val = res.value
+                    else:
+                        val = 'X'
                 cur_row.append(val)
             lol.append(cur_row)
         return Table(lol)
@@ -378,53 +510,96 @@ class BaseConfig(object):
         if self._unresolved:
             sorted_unres = sorted(self._unresolved)
             raise ConfigException('could not resolve: %r' % sorted_unres)
-        if DEBUG:
-            print self._config_proc
+        self._config_proc._log_debug('%r', self._config_proc)
         self._post_process()
 
 
+def _build_invoker(func, dep_names):
+    """\
+    Returns a function which calls func with the values of its deps,
+    passed by keyword (as utils.inject() does, so providers declaring
+    their args via _argspec and **kwargs still work), without
+    re-reading the argspec on every call.
+    """
+    return lambda name_value_map: func(**dict([(dn, name_value_map[dn])
+                                               for dn in dep_names]))
+
+
+def _get_indegree_maps(dep_map):
+    """\
+    Returns a copy of the dep_map (with any unlisted deps added as
+    dependency-less items), a map of each item's count of unemitted
+    dependencies, and a reverse map of each item's direct consumers.
+    """
+    dep_map = dict(dep_map)
+    extras = set().union(*dep_map.values()) - set(dep_map)
+    dep_map.update([(k, set()) for k in extras])
+    indegree_map, consumer_map = {}, {}
+    for item, deps in dep_map.items():
+        indegree_map[item] = len(deps)
+        for dep in deps:
+            consumer_map.setdefault(dep, []).append(item)
+    return dep_map, indegree_map, consumer_map
+
+
+def _raise_cycle(indegree_map):
+    remaining = sorted([k for k, v in indegree_map.items() if v > 0])
+    raise DependencyCycle('unresolvable dependencies: %r' % remaining)
+
+
 def toposort(dep_map):
     "expects a dict of {item: set([deps])}"
-    ret, dep_map = [], dict(dep_map)
     if not dep_map:
         return []
-    extras = set.union(*dep_map.values()) - set(dep_map)
-    dep_map.update([(k, set()) for k in extras])
-    remaining = dict(dep_map)
-    while remaining:
-        cur = set([item for item, deps in remaining.items() if not deps])
-        if not cur:
-            break
-        ret.append(cur)
-        remaining = dict([(item, deps - cur) for item, deps
-                          in remaining.items() if item not in cur])
-    if remaining:
-        raise ValueError('unresolvable dependencies: %r' % remaining)
+    ret = []
+    _, indegree_map, consumer_map = _get_indegree_maps(dep_map)
+    ready = deque([k for k, v in indegree_map.items() if v == 0])
+    emitted = 0
+    while ready:
+        cur, ready = ready, deque()
+        ret.append(set(cur))
+        emitted += len(cur)
+        for item in cur:
+            for consumer in consumer_map.get(item, ()):
+                indegree_map[consumer] -= 1
+                if indegree_map[consumer] == 0:
+                    ready.append(consumer)
+    if emitted < len(indegree_map):
+        _raise_cycle(indegree_map)
     return ret
 
 
 def jit_toposort(dep_map):
-    "expects a dict of {item: set([deps])}"
-    ret, orig_dep_map, dep_map = [], dep_map, dict(dep_map)
+    """\
+    expects a dict of {item: set([deps])}
+
+    Unlike toposort, each level contains the items used by the items
+    that became resolvable at that level, so items appear as late as
+    possible ("just in time"). Anything never used comes last.
+    """
     if not dep_map:
         return []
-    extras = set.union(*dep_map.values()) - set(dep_map)
-    dep_map.update([(k, set()) for k in extras])
-    remaining = dict(dep_map)
-    ready = set()
-    while remaining:
-        cur = set([item for item, deps in remaining.items() if not deps])
-        if not cur:
-            break
-        ready.update(cur)
-        cur_used = set([r for r in ready
-                        if any([r in orig_dep_map[c] for c in cur])])
-        ret.append(cur_used)
-        ready = ready - cur_used
-        remaining = dict([(item, deps - cur) for item, deps
-                          in remaining.items() if item not in cur])
-    if ready:
-        ret.append(ready)
-    if remaining:
-        raise ValueError('unresolvable dependencies: %r' % remaining)
-    return ret[1:]  # nothing's every used before the first thing, so snip snip
+    ret = []
+    dep_map, indegree_map, consumer_map = _get_indegree_maps(dep_map)
+    ready = deque([k for k, v in indegree_map.items() if v == 0])
+    unused, emitted = set(), 0
+    while ready:
+        cur, ready = ready, deque()
+        unused.update(cur)
+        emitted += len(cur)
+        needed = set()
+        for item in cur:
+            for consumer in consumer_map.get(item, ()):
+                indegree_map[consumer] -= 1
+                if indegree_map[consumer] == 0:
+                    ready.append(consumer)
+                    needed.update(dep_map[consumer])
+        cur_used = unused & needed
+        unused -= cur_used
+        if cur_used:
+            ret.append(cur_used)
+    if unused:
+        ret.append(unused)
+    if emitted < len(indegree_map):
+        _raise_cycle(indegree_map)
+    return ret
@@ -7,6 +7,8 @@ DEBUG = False
 from .utils import under2camel, camel2under, get_arg_names
 from .errors import MissingValue, ProviderError, NotProvidable
 
+_DEP_NAMES_CACHE = {}
+
 
 class VariableMeta(type):
     def __new__(mcls, name, bases, attrs):
@@ -68,8 +70,12 @@ class Layer(object):
     def _get_autoprovided(cls):
         """
         returns Variable instances for automatically provided
-        variables within a Layer.
+        variables within a Layer. Computed once per Layer type; checked
+        in the class's own __dict__ so subclasses compute their own.
         """
+        cached = cls.__dict__.get('_cached_autoprovided')
+        if cached is not None:
+            return list(cached)
         cn = cls.__name__
         # get explicit autoprovides
         eap = getattr(cls, '_autoprovided', [])
@@ -106,7 +112,8 @@ class Layer(object):
         if unconverted:
             raise TypeError('unable to resolve %s autoprovided variables: %r'
                             % (cn, unconverted))
-        return ap_var_map.values()
+        cls._cached_autoprovided = ap_var_map.values()
+        return list(cls._cached_autoprovided)
 
     def __repr__(self):
         return '%s()' % self.__class__.__name__
@@ -117,8 +124,11 @@ class Provider(object):
     Used internally to represent a single Layer instance's implementation
     of a single Variable. (the intersection of Layer and Variable).
     """
+    # _layer_order and _invoker are set by ConfigProcessor on bound providers
+    __slots__ = ('layer_inst', 'layer_type', 'var_name', 'func', 'dep_names',
+                 '_layer_order', '_invoker')
 
-    def __init__(self, layer, var_name, func):
+    def __init__(self, layer, var_name, func, dep_names=None):
         if isinstance(layer, type):
             self.layer_inst = None
             self.layer_type = layer
@@ -127,8 +137,11 @@ class Provider(object):
             self.layer_type = type(layer)
         self.var_name = var_name
         self.func = func
+        if dep_names is not None:
+            self.dep_names = tuple(dep_names)
+            return
         try:
-            self.dep_names = get_arg_names(self.func)
+            self.dep_names = _get_dep_names(self.func)
         except:
             raise ProviderError('unsupported provider type: %r' % self.func)
 
@@ -149,7 +162,7 @@ class Provider(object):
         except AttributeError:
             pass
         p_type = type(self)
-        return p_type(layer_inst, var_name, func)
+        return p_type(layer_inst, var_name, func, self.dep_names)
 
     def __repr__(self):
         cn = self.__class__.__name__
@@ -161,6 +174,23 @@ class Provider(object):
             return super(Provider, self).__repr__()
 
 
+def _get_dep_names(func):
+    """
+    get_arg_names(), memoized on the function's code object. Whether
+    the callable is a method is part of the key, as methods have their
+    first argument dropped.
+    """
+    code = getattr(getattr(func, 'im_func', func), '__code__', None)
+    if code is None or hasattr(func, '_argspec'):
+        return get_arg_names(func)  # callable objects, explicit argspecs
+    key = (code, isinstance(func, MethodType))
+    try:
+        return _DEP_NAMES_CACHE[key]
+    except KeyError:
+        ret = _DEP_NAMES_CACHE[key] = get_arg_names(func)
+        return ret
+
+
 class FileValue(object):
     def __init__(self, value, file_path):
         self.value = value
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import sys
+import logging
+import subprocess
+from StringIO import StringIO
+from os.path import abspath, dirname
 from pprint import pprint
+from inspect import ArgSpec
 
 from strata.core import Layer
-from strata.config import ConfigSpec
+from strata.config import ConfigSpec, ConfigProcessor
 
 from strata.core import ez_vars  # tmp
 
@@ -81,5 +87,125 @@ def test_basic_vars():
     return conf
 
 
+def test_dep_layer_priority():
+    "Deps pulled in by a consumer are still provided by the earliest layer"
+    class UpperLayer(Layer):
+        def var_c(self, var_b):
+            return var_b
+
+        def var_b(self):
+            return 'upper'
+
+    class LowerLayer(Layer):
+        def var_b(self):
+            return 'lower'
+
+    layers = [UpperLayer, LowerLayer]
+    conf = get_basic_config(cspec=get_basic_config_spec(layers))()
+    assert conf.var_b == 'upper'
+    assert conf.var_c == 'upper'
+
+
+def test_argspec_provider():
+    "Providers declaring their args via _argspec get them by keyword"
+    def _var_d(**kw):
+        return kw['var_b'] + kw['var_a']
+    _var_d._argspec = ArgSpec(['var_b', 'var_a'], None, 'kw', None)
+
+    class ArgSpecLayer(Layer):
+        var_d = staticmethod(_var_d)
+
+        def var_a(self):
+            return 1
+
+        def var_b(self):
+            return 2
+
+    layers = [ArgSpecLayer]
+    conf = get_basic_config(cspec=get_basic_config_spec(layers))()
+    assert conf.var_d == 3
+
+
+def test_no_debugger_import():
+    # checked in a fresh interpreter, as test runners may load pdb
+    code = ('import sys; from strata import ConfigSpec; '
+            'ConfigSpec([], []).make_config()(); '
+            'assert "pdb" not in sys.modules')
+    repo_root = dirname(dirname(dirname(abspath(__file__))))
+    subprocess.check_call([sys.executable, '-c', code], cwd=repo_root)
+
+
+def test_spec_cache():
+    variables = ez_vars(BASIC_LAYERS)
+    cspec = ConfigSpec.cached(variables, BASIC_LAYERS)
+    assert ConfigSpec.cached(variables, BASIC_LAYERS) is cspec
+    assert ConfigSpec.cached(ez_vars(BASIC_LAYERS), BASIC_LAYERS) is not cspec
+    assert ConfigSpec(variables, BASIC_LAYERS) is not cspec
+    ConfigSpec.clear_cache()
+    assert ConfigSpec.cached(variables, BASIC_LAYERS) is not cspec
+
+
+def test_uncached_spec_rebuild():
+    "Building a spec directly picks up changes to its layers"
+    class ChangingLayer(Layer):
+        def var_a(self):
+            return 1
+
+    layers = [ChangingLayer]
+    variables = ez_vars(layers)
+    assert ConfigSpec(variables, layers).make_config()().var_a == 1
+    ChangingLayer.var_a = lambda self: 2
+    assert ConfigSpec(variables, layers).make_config()().var_a == 2
+
+
+def test_autoprovided_cache():
+    class ParentLayer(Layer):
+        _autoprovided = ['var_p']
+
+        def var_p(self):
+            return 'p'
+
+    class ChildLayer(ParentLayer):
+        pass
+
+    parent_vars = ParentLayer._get_autoprovided()
+    assert ParentLayer._get_autoprovided()[0] is parent_vars[0]
+    assert '_cached_autoprovided' not in ChildLayer.__dict__
+    child_vars = ChildLayer._get_autoprovided()
+    assert ChildLayer._get_autoprovided()[0] is child_vars[0]
+    assert child_vars[0].name == 'var_p'
+
+
+def test_unique_consumers():
+    variables = ez_vars(BASIC_LAYERS)
+    cspec = ConfigSpec(variables + variables, BASIC_LAYERS)
+    for consumers in cspec.var_consumer_map.values():
+        keys = [(c.layer_type, c.var_name) for c in consumers]
+        assert len(keys) == len(set(keys))
+
+
+def test_debug_processor():
+    "debug=True prints results for that processor only"
+    class DebugProcessor(ConfigProcessor):
+        def __init__(self, config):
+            super(DebugProcessor, self).__init__(config, debug=True)
+
+    class DebugConfig(get_basic_config()):
+        _config_proc_type = DebugProcessor
+
+    logger = logging.getLogger('strata.config')
+    orig_level = logger.level
+    orig_stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        DebugConfig()
+        debug_output = sys.stdout.getvalue()
+    finally:
+        sys.stdout = orig_stdout
+    assert ' == Pruned(' in debug_output
+    assert ' - Unsatisfied(' in debug_output
+    assert logger.level == orig_level
+    assert not get_basic_config()()._config_proc._debug
+
+
 if __name__ == '__main__':
     test_basic_vars()
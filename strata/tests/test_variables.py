@@ -44,3 +44,30 @@ def test_integer():
 def test_float():
     _do_value_test(5.0, 5.0, Float(min_val=5, max_val=5))
     _do_value_test(3.1415, 3.14, Float(ndigits=2))
+
+
+def test_validator_inheritance():
+    class BaseVar(Variable):
+        pass
+
+    class SubVar(BaseVar):
+        pass
+
+    class CustomVar(BaseVar):
+        def process_value(self, value):
+            return 'custom'
+
+    assert SubVar().process_value('1') == '1'
+    BaseVar.validator = int
+    assert SubVar().process_value('1') == 1
+    assert CustomVar().process_value('1') == 'custom'
+    BaseVar.validator = None
+    assert SubVar().process_value('1') == '1'
+
+
+def test_instance_validator():
+    class PortVar(Variable):
+        def __init__(self):
+            self.validator = int
+
+    assert PortVar().process_value('8080') == 8080